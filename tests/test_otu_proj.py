@@ -80,7 +80,7 @@ class TestDataProcessAnalysis(unittest.TestCase):
         # Tests that the mean and standard deviation dataframes generated by the data_process_analysis function
         # match saved expected results
         xlsx_data = pd.read_excel(SAMPLE_DATA_FILE_LOC, index_col=0)
-        analysis_mean_vals, analysis_sd_vals = data_process_analysis(xlsx_data, FNAME)
+        analysis_mean_vals, analysis_sd_vals = data_process_analysis(xlsx_data, FNAME, write_excel=False)
         expected_mean_vals = pd.read_excel(os.path.join(TEST_DATA_DIR, "OTU_data_results.xlsx"),
                                            sheet_name='mean', index_col=0)
         expected_sd_vals = pd.read_excel(os.path.join(TEST_DATA_DIR, "OTU_data_results.xlsx"),
@@ -91,7 +91,7 @@ class TestDataProcessAnalysis(unittest.TestCase):
     def testSampleData2(self):
         # A second check, with slightly different values, of the data_analysis function
         xlsx_data = pd.read_excel(SAMPLE_DATA2_FILE_LOC, index_col=0)
-        analysis_mean_vals, analysis_sd_vals = data_process_analysis(xlsx_data, FNAME)
+        analysis_mean_vals, analysis_sd_vals = data_process_analysis(xlsx_data, FNAME, write_excel=False)
         expected_mean_vals = pd.read_excel(os.path.join(TEST_DATA_DIR, "OTU_data2_results.xlsx"),
                                            sheet_name='mean', index_col=0)
         expected_sd_vals = pd.read_excel(os.path.join(TEST_DATA_DIR, "OTU_data2_results.xlsx"),